@@ -3,14 +3,20 @@ Instagram Notification Analytics Dashboard
 Generates visual analytics and reports from notification data
 """
 
-import mysql.connector
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import heapq
+import json
 import os
 import warnings
 from sqlalchemy import create_engine
+from notification_templates import CATEGORY_NAMES, get_template_label
+from sketches import NotificationSketch, QuantileSketch
+import storage
 
 # Suppress warnings
 warnings.filterwarnings('ignore')
@@ -22,47 +28,65 @@ plt.rcParams['font.size'] = 10
 # Use a font that supports emojis better
 plt.rcParams['font.family'] = 'DejaVu Sans'
 
-# Database configuration
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'varun5526',
-    'database': 'instagram'
-}
+# Raise query errors instead of printing them and skipping the report (--strict, benchmark.py)
+STRICT = False
 
-def create_connection():
-    """Create MySQL database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Exception as e:
-        print(f"❌ Error connecting to MySQL: {e}")
-        return None
+def create_connection(shard=0):
+    """Create MySQL database connection to one shard"""
+    connection = storage.connect(shard)
+    if connection is None:
+        print(f"❌ Error connecting to MySQL shard {shard}")
+    return connection
 
-def create_sqlalchemy_engine():
+def create_sqlalchemy_engine(shard=0):
     """Create SQLAlchemy engine for pandas compatibility"""
     try:
-        connection_string = f"mysql+mysqlconnector://{DB_CONFIG['user']}:{DB_CONFIG['password']}@{DB_CONFIG['host']}/{DB_CONFIG['database']}"
-        engine = create_engine(connection_string)
+        engine = create_engine(storage.sqlalchemy_url(shard))
         return engine
     except Exception as e:
         print(f"❌ Error creating SQLAlchemy engine: {e}")
         return None
 
-def execute_query(query):
-    """Execute a query and return results as DataFrame using SQLAlchemy"""
-    engine = create_sqlalchemy_engine()
+def query_shard(query, shard):
+    """Execute a query on one shard and return results as DataFrame"""
+    engine = create_sqlalchemy_engine(shard)
     if engine is None:
-        return None
+        raise RuntimeError(f"No engine for shard {shard}")
     
     try:
-        df = pd.read_sql(query, engine)
-        return df
+        return pd.read_sql(query, engine)
+    finally:
+        engine.dispose()
+
+def execute_query(query, group_by=None, sort_by=None, ascending=True, limit=None, with_shard=False):
+    """Execute a query on every shard and gather the results into one DataFrame
+    
+    Per-shard results are concatenated (with_shard adds a leading `shard`
+    column, since IDs are only unique within a shard). With group_by, the
+    remaining numeric (count) columns are summed per group; sort_by and limit
+    are then applied to the combined result, since per-shard ORDER BY/LIMIT
+    are not global.
+    """
+    try:
+        with ThreadPoolExecutor(max_workers=len(storage.SHARDS)) as pool:
+            frames = list(pool.map(lambda shard: query_shard(query, shard), range(len(storage.SHARDS))))
     except Exception as e:
+        if STRICT:
+            raise
         print(f"❌ Error executing query: {e}")
         return None
-    finally:
-        engine.dispose()
+    
+    if with_shard:
+        for shard, frame in enumerate(frames):
+            frame.insert(0, 'shard', shard)
+    df = pd.concat(frames, ignore_index=True)
+    if group_by:
+        df = df.groupby(group_by, as_index=False, sort=False, dropna=False).sum(numeric_only=True)
+    if sort_by:
+        df = df.sort_values(sort_by, ascending=ascending, ignore_index=True)
+    if limit:
+        df = df.head(limit)
+    return df
 
 def create_output_directory():
     """Create directory for analytics outputs"""
@@ -82,16 +106,20 @@ def generate_summary_stats():
         (SELECT COUNT(*) FROM notifications) AS total_notifications,
         (SELECT COUNT(*) FROM notifications WHERE type = 'foreground') AS foreground_count,
         (SELECT COUNT(*) FROM notifications WHERE type = 'background') AS background_count,
-        (SELECT COUNT(*) FROM notifications WHERE DATE(received_at) = CURDATE()) AS today_count,
+        (SELECT COUNT(*) FROM notifications WHERE received_at >= CURDATE()) AS today_count,
         (SELECT COUNT(*) FROM notifications WHERE received_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)) AS last_7_days,
-        (SELECT COUNT(DISTINCT DATE(received_at)) FROM notifications) AS active_days,
         (SELECT MAX(received_at) FROM notifications) AS last_notification,
         (SELECT MIN(received_at) FROM notifications) AS first_notification
     """
     
     df = execute_query(query)
-    if df is not None and not df.empty:
-        stats = df.iloc[0]
+    days = execute_query("SELECT DISTINCT DATE(received_at) AS day FROM notifications")
+    if df is not None and not df.empty and days is not None:
+        # One row per shard: counts add up, first/last are min/max, days are unioned
+        stats = df.drop(columns=['last_notification', 'first_notification']).sum()
+        stats['last_notification'] = df['last_notification'].max()
+        stats['first_notification'] = df['first_notification'].min()
+        stats['active_days'] = days['day'].nunique()
         print(f"\n📈 Total Notifications: {stats['total_notifications']}")
         print(f"🔔 Foreground: {stats['foreground_count']}")
         print(f"🔕 Background: {stats['background_count']}")
@@ -113,7 +141,7 @@ def generate_summary_stats():
 def plot_notification_types(output_dir):
     """Create pie chart for notification types"""
     query = "SELECT type, COUNT(*) as count FROM notifications GROUP BY type"
-    df = execute_query(query)
+    df = execute_query(query, group_by='type')
     
     if df is not None and not df.empty:
         plt.figure(figsize=(10, 6))
@@ -140,7 +168,7 @@ def plot_hourly_distribution(output_dir):
     GROUP BY HOUR(received_at), type
     ORDER BY hour
     """
-    df = execute_query(query)
+    df = execute_query(query, group_by=['hour', 'type'], sort_by='hour')
     
     if df is not None and not df.empty:
         plt.figure(figsize=(14, 6))
@@ -163,22 +191,24 @@ def plot_hourly_distribution(output_dir):
 
 def plot_top_actions(output_dir):
     """Create horizontal bar chart for top notification actions"""
+    # Group on the indexed template ID so every username/count variant counts once
     query = """
     SELECT 
-        SUBSTRING(body, 1, 50) AS action,
+        template_id,
         COUNT(*) AS count
     FROM notifications
-    GROUP BY body
-    ORDER BY count DESC
-    LIMIT 10
+    WHERE template_id IS NOT NULL
+    GROUP BY template_id
     """
-    df = execute_query(query)
+    # The top 10 per shard is not the global top 10, so limit after gathering
+    df = execute_query(query, group_by='template_id', sort_by='count', ascending=False, limit=10)
     
     if df is not None and not df.empty:
         plt.figure(figsize=(12, 8))
         
         # Remove emojis for better rendering
-        df['action_clean'] = df['action'].str.encode('ascii', 'ignore').str.decode('ascii')
+        df['action'] = df['template_id'].map(get_template_label)
+        df['action_clean'] = df['action'].str.encode('ascii', 'ignore').str.decode('ascii').str.strip()
         
         colors = plt.cm.viridis(range(len(df)))
         plt.barh(df['action_clean'], df['count'], color=colors)
@@ -196,6 +226,40 @@ def plot_top_actions(output_dir):
         plt.close()
         print(f"✅ Saved: {filename}")
 
+def plot_notification_categories(output_dir):
+    """Create bar chart for notification categories"""
+    query = """
+    SELECT 
+        category_id,
+        COUNT(*) AS count
+    FROM notifications
+    WHERE category_id IS NOT NULL
+    GROUP BY category_id
+    ORDER BY count DESC
+    """
+    df = execute_query(query, group_by='category_id', sort_by='count', ascending=False)
+    
+    if df is not None and not df.empty:
+        plt.figure(figsize=(12, 6))
+        
+        df['category'] = df['category_id'].map(lambda c: CATEGORY_NAMES.get(c, f"Category {c}").capitalize())
+        
+        colors = ['#667eea' if i % 2 == 0 else '#764ba2' for i in range(len(df))]
+        plt.bar(df['category'], df['count'], color=colors, edgecolor='black', linewidth=1.5)
+        plt.title('Notifications by Category', fontsize=16, fontweight='bold', pad=20)
+        plt.xlabel('Category', fontsize=12)
+        plt.ylabel('Number of Notifications', fontsize=12)
+        plt.grid(axis='y', alpha=0.3)
+        
+        # Add value labels
+        for i, v in enumerate(df['count']):
+            plt.text(i, v + 0.1, str(int(v)), ha='center', fontweight='bold')
+        
+        filename = os.path.join(output_dir, 'notification_categories.png')
+        plt.savefig(filename, dpi=300, bbox_inches='tight')
+        plt.close()
+        print(f"✅ Saved: {filename}")
+
 def plot_daily_trend(output_dir):
     """Create line chart for daily trend"""
     query = """
@@ -208,7 +272,7 @@ def plot_daily_trend(output_dir):
     GROUP BY DATE(received_at), type
     ORDER BY date
     """
-    df = execute_query(query)
+    df = execute_query(query, group_by=['date', 'type'], sort_by='date')
     
     if df is not None and not df.empty:
         plt.figure(figsize=(14, 6))
@@ -246,7 +310,7 @@ def plot_day_of_week(output_dir):
     GROUP BY DAYNAME(received_at), DAYOFWEEK(received_at)
     ORDER BY day_num
     """
-    df = execute_query(query)
+    df = execute_query(query, group_by=['day_name', 'day_num'], sort_by='day_num')
     
     if df is not None and not df.empty:
         plt.figure(figsize=(12, 6))
@@ -284,7 +348,7 @@ def plot_time_period_heatmap(output_dir):
     GROUP BY day_name, day_num, time_period
     ORDER BY day_num
     """
-    df = execute_query(query)
+    df = execute_query(query, group_by=['day_name', 'day_num', 'time_period'], sort_by='day_num')
     
     if df is not None and not df.empty:
         # Pivot for heatmap
@@ -317,7 +381,7 @@ def plot_notification_timeline(output_dir):
     ORDER BY received_at DESC
     LIMIT 50
     """
-    df = execute_query(query)
+    df = execute_query(query, sort_by='received_at', ascending=False, limit=50)
     
     if df is not None and not df.empty:
         plt.figure(figsize=(14, 8))
@@ -344,13 +408,70 @@ def plot_notification_timeline(output_dir):
         plt.close()
         print(f"✅ Saved: {filename}")
 
+def plot_delivery_latency(output_dir):
+    """Create line chart and CSV of delivery latency percentiles"""
+    # Pre-bucket in SQL with the quantile sketch's log buckets, so only
+    # (hour, type, category, bucket) counts leave the database, not every row
+    log_gamma = QuantileSketch().log_gamma
+    query = f"""
+    SELECT 
+        HOUR(received_at) AS hour,
+        type,
+        category_id,
+        CASE WHEN latency_ms > 0 THEN CEIL(LN(latency_ms) / {log_gamma!r}) END AS bucket,
+        COUNT(*) AS count
+    FROM notifications
+    WHERE latency_ms IS NOT NULL
+    GROUP BY hour, type, category_id, bucket
+    """
+    df = execute_query(query, group_by=['hour', 'type', 'category_id', 'bucket'],
+                       sort_by=['hour', 'type', 'category_id'])
+    
+    if df is not None and not df.empty:
+        # One sketch per hour, type and category, and per hour x type x category
+        sketches = {}
+        for hour, ntype, category_id, bucket, count in df.itertuples(index=False):
+            category = CATEGORY_NAMES.get(category_id, 'general')
+            index = None if pd.isna(bucket) else int(bucket)
+            for key in [('hour', int(hour)), ('type', ntype), ('category', category),
+                        ('hour,type,category', f"{int(hour)},{ntype},{category}")]:
+                sketches.setdefault(key, QuantileSketch()).add_bucket(index, int(count))
+        
+        report = pd.DataFrame([
+            {'dimension': dimension, 'value': value, 'count': sketch.count,
+             'p50_ms': sketch.quantile(0.5), 'p95_ms': sketch.quantile(0.95), 'p99_ms': sketch.quantile(0.99)}
+            for (dimension, value), sketch in sketches.items()
+        ])
+        report = report.sort_values('dimension', kind='stable', ignore_index=True)
+        filepath = os.path.join(output_dir, 'delivery_latency.csv')
+        report.to_csv(filepath, index=False)
+        print(f"✅ Saved: {filepath} (±{QuantileSketch().error_bound():.0%} relative error)")
+        
+        hourly = report[report['dimension'] == 'hour']
+        plt.figure(figsize=(14, 6))
+        for column, color in [('p50_ms', '#667eea'), ('p95_ms', '#764ba2'), ('p99_ms', '#e74c3c')]:
+            plt.plot(hourly['value'].astype(int), hourly[column], 
+                    marker='o', linewidth=2, markersize=6, color=color, label=column[:3])
+        plt.title('Delivery Latency by Hour of Day', fontsize=16, fontweight='bold', pad=20)
+        plt.xlabel('Hour of Day', fontsize=12)
+        plt.ylabel('Latency (ms)', fontsize=12)
+        plt.legend(title='Percentile', title_fontsize=11)
+        plt.grid(True, alpha=0.3)
+        
+        filename = os.path.join(output_dir, 'delivery_latency.png')
+        plt.savefig(filename, dpi=300, bbox_inches='tight')
+        plt.close()
+        print(f"✅ Saved: {filename}")
+
 def generate_csv_reports(output_dir):
     """Generate CSV reports for further analysis"""
     print("\n📄 Generating CSV Reports...")
     
+    # filename -> (query, how to combine the per-shard results)
     reports = {
-        'all_notifications.csv': "SELECT * FROM notifications ORDER BY received_at DESC",
-        'hourly_summary.csv': """
+        'all_notifications.csv': ("SELECT * FROM notifications ORDER BY received_at DESC",
+                                  {'sort_by': 'received_at', 'ascending': False, 'with_shard': True}),
+        'hourly_summary.csv': ("""
             SELECT 
                 HOUR(received_at) AS hour,
                 type,
@@ -358,8 +479,8 @@ def generate_csv_reports(output_dir):
             FROM notifications
             GROUP BY HOUR(received_at), type
             ORDER BY hour, type
-        """,
-        'daily_summary.csv': """
+        """, {'group_by': ['hour', 'type'], 'sort_by': ['hour', 'type']}),
+        'daily_summary.csv': ("""
             SELECT 
                 DATE(received_at) AS date,
                 type,
@@ -367,8 +488,19 @@ def generate_csv_reports(output_dir):
             FROM notifications
             GROUP BY DATE(received_at), type
             ORDER BY date DESC, type
-        """,
-        'weekly_summary.csv': """
+        """, {'group_by': ['date', 'type'], 'sort_by': ['date', 'type'], 'ascending': [False, True]}),
+        'category_summary.csv': ("""
+            SELECT 
+                category_id,
+                template_id,
+                COUNT(*) AS count
+            FROM notifications
+            WHERE category_id IS NOT NULL
+            GROUP BY category_id, template_id
+            ORDER BY category_id, count DESC
+        """, {'group_by': ['category_id', 'template_id'], 'sort_by': ['category_id', 'count'],
+              'ascending': [True, False]}),
+        'weekly_summary.csv': ("""
             SELECT 
                 YEARWEEK(received_at) AS year_week,
                 type,
@@ -376,18 +508,180 @@ def generate_csv_reports(output_dir):
             FROM notifications
             GROUP BY YEARWEEK(received_at), type
             ORDER BY year_week DESC, type
-        """
+        """, {'group_by': ['year_week', 'type'], 'sort_by': ['year_week', 'type'], 'ascending': [False, True]})
     }
     
-    for filename, query in reports.items():
-        df = execute_query(query)
+    for filename, (query, combine) in reports.items():
+        df = execute_query(query, **combine)
         if df is not None:
             filepath = os.path.join(output_dir, filename)
             df.to_csv(filepath, index=False)
             print(f"✅ Saved: {filepath}")
 
+def stream_shard(shard, after_id=0, upto_id=None):
+    """Yield (received_at, type, body, template_id) rows of one shard with after_id < id <= upto_id, ordered by received_at"""
+    connection = create_connection(shard)
+    if connection is None:
+        raise RuntimeError(f"Database connection failed for shard {shard}")
+    
+    try:
+        cursor = connection.cursor()  # Unbuffered: rows are fetched as they are consumed
+        cursor.execute("""
+            SELECT received_at, type, body, template_id
+            FROM notifications
+            WHERE id > %s AND id <= %s
+            ORDER BY received_at
+        """, (after_id, upto_id))
+        for row in cursor:
+            yield row
+        cursor.close()
+    finally:
+        connection.close()
+
+def shard_max_ids():
+    """Return the current MAX(id) of every shard"""
+    results = storage.scatter("SELECT COALESCE(MAX(id), 0) FROM notifications")
+    return [rows[0][0] for _, rows in sorted(results)]
+
+def stream_notifications(after_ids, upto_ids):
+    """Yield each shard's rows in (after_ids, upto_ids] merged into a single received_at-ordered stream"""
+    streams = [stream_shard(shard, after_ids[shard], upto_ids[shard]) for shard in range(len(storage.SHARDS))]
+    return heapq.merge(*streams, key=lambda row: row[0])
+
+def update_daily_sketches(sketch_dir):
+    """Sketch every row inserted since the last run in a single streaming pass
+    
+    Rows are selected by a per-shard id cursor, not by received_at: the API
+    refreshes duplicates by moving received_at to now, and a received_at
+    cursor would count such a row again on its new day. Each row is sketched
+    once, on the day it had when first scanned.
+    """
+    if not os.path.exists(sketch_dir):
+        os.makedirs(sketch_dir)
+    
+    cursor_file = os.path.join(sketch_dir, 'cursor.json')
+    shards = [f"{config['host']}:{config['port']}" for config in storage.SHARDS]
+    after_ids = None
+    if os.path.exists(cursor_file):
+        with open(cursor_file) as f:
+            state = json.load(f)
+        if state['shards'] == shards:
+            after_ids = state['last_ids']
+    if after_ids is None:
+        # No cursor (or a different shard list): rebuild every daily sketch
+        for filename in os.listdir(sketch_dir):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(sketch_dir, filename))
+        after_ids = [0] * len(shards)
+    # Fix the upper bounds first so rows inserted while streaming wait for the next run
+    upto_ids = shard_max_ids()
+    
+    def save(day, sketch):
+        # Rows for a day that is already sketched are merged into its sketch
+        path = os.path.join(sketch_dir, f"{day}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                sketch = NotificationSketch.from_dict(json.load(f)).merge(sketch)
+        with open(path, 'w') as f:
+            json.dump(sketch.to_dict(), f)
+    
+    current_day, sketch, scanned = None, None, 0
+    for received_at, notification_type, body, template_id in stream_notifications(after_ids, upto_ids):
+        day = received_at.date().isoformat()
+        if day != current_day:
+            if sketch is not None:
+                save(current_day, sketch)
+            current_day, sketch = day, NotificationSketch()
+        # Like plot_top_actions, only template rows count towards top actions
+        action = get_template_label(template_id) if template_id is not None else None
+        sketch.add(received_at, notification_type, body, action)
+        scanned += 1
+    if sketch is not None:
+        save(current_day, sketch)
+    
+    with open(cursor_file, 'w') as f:
+        json.dump({'shards': shards, 'last_ids': upto_ids}, f)
+    print(f"✅ Sketched {scanned} new rows into: {sketch_dir}")
+
+def load_merged_sketch(sketch_dir):
+    """Merge all daily sketches in date order; returns (sketch, active_days)"""
+    merged, active_days = NotificationSketch(), 0
+    for filename in sorted(f for f in os.listdir(sketch_dir) if f.endswith('.json') and f != 'cursor.json'):
+        with open(os.path.join(sketch_dir, filename)) as f:
+            day_sketch = NotificationSketch.from_dict(json.load(f))
+        if day_sketch.total:
+            active_days += 1
+            merged.merge(day_sketch)
+    return merged, active_days
+
+def generate_approx_report(output_dir):
+    """Generate approximate analytics from mergeable daily sketches"""
+    print("\n" + "="*60)
+    print("📐 APPROXIMATE NOTIFICATION ANALYTICS (SKETCHES)")
+    print("="*60)
+    
+    sketch_dir = os.path.join(output_dir, 'sketches')
+    try:
+        update_daily_sketches(sketch_dir)
+    except (RuntimeError, storage.Error) as e:
+        if STRICT:
+            raise
+        print(f"❌ {e}")
+        return None
+    sketch, active_days = load_merged_sketch(sketch_dir)
+    
+    if sketch.total == 0:
+        print("\n⚠️  No notifications found in database!")
+        return None
+    
+    distinct = sketch.distinct_bodies.count()
+    distinct_error = sketch.distinct_bodies.error_bound()
+    top_error = sketch.top_actions.error_bound()
+    gap_error = sketch.inter_arrival.error_bound()
+    gaps = {f"p{int(q * 100)}": sketch.inter_arrival.quantile(q) for q in (0.5, 0.95, 0.99)}
+    
+    print(f"\n📈 Total Notifications: {sketch.total}")
+    for ntype, count in sorted(sketch.type_counts.items()):
+        print(f"🔔 {ntype.capitalize()}: {count}")
+    print(f"🗓️  Active Days: {active_days}")
+    print(f"🧮 Distinct Bodies: ~{distinct} (±{distinct_error:.1%} std. error)")
+    print(f"\n🏆 Top Actions (counts overestimate by at most {top_error:.0f}):")
+    for action, count, error in sketch.top_actions.top(10):
+        print(f"   {count:>8} (-{error:<6}) {action}")
+    print(f"\n⏱️  Inter-arrival Time (±{gap_error:.0%} relative error):")
+    for name, value in gaps.items():
+        print(f"   {name}: {value:.2f}s" if value is not None else f"   {name}: n/a")
+    print("="*60)
+    
+    report = {
+        'total_notifications': sketch.total,
+        'type_counts': sketch.type_counts,
+        'active_days': active_days,
+        'distinct_bodies': {'estimate': distinct, 'relative_std_error': distinct_error},
+        'top_actions': {
+            'max_overestimate': top_error,
+            'items': [{'action': a, 'count': c, 'max_overestimate': e} for a, c, e in sketch.top_actions.top(10)]
+        },
+        'inter_arrival_seconds': {'quantiles': gaps, 'relative_error': gap_error}
+    }
+    filename = os.path.join(output_dir, 'approx_summary.json')
+    with open(filename, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"✅ Saved: {filename}")
+    return report
+
 def main():
     """Main function to run all analytics"""
+    parser = argparse.ArgumentParser(description='Instagram notification analytics')
+    parser.add_argument('--approx', action='store_true',
+                       help='Use mergeable sketches (HyperLogLog, Space-Saving, quantiles) instead of exact queries')
+    parser.add_argument('--strict', action='store_true',
+                       help='Stop with an error when a query fails instead of skipping that report')
+    args = parser.parse_args()
+    
+    global STRICT
+    STRICT = args.strict
+    
     print("\n🚀 Starting Instagram Notification Analytics...")
     print("="*60)
     
@@ -395,6 +689,10 @@ def main():
     output_dir = create_output_directory()
     print(f"\n📁 Output Directory: {output_dir}")
     
+    if args.approx:
+        generate_approx_report(output_dir)
+        return
+    
     # Generate summary statistics
     stats = generate_summary_stats()
     
@@ -411,10 +709,12 @@ def main():
         plot_notification_types(output_dir)
         plot_hourly_distribution(output_dir)
         plot_top_actions(output_dir)
+        plot_notification_categories(output_dir)
         plot_daily_trend(output_dir)
         plot_day_of_week(output_dir)
         plot_time_period_heatmap(output_dir)
         plot_notification_timeline(output_dir)
+        plot_delivery_latency(output_dir)
     except Exception as e:
         print(f"⚠️  Warning: Some visualizations may have failed: {e}")
     
@@ -1,26 +1,79 @@
 from flask import Flask, request, jsonify, send_from_directory
 from flask_cors import CORS
-import mysql.connector
-from mysql.connector import Error
-import os
+from mysql.connector import Error, errorcode
+from mysql.connector.constants import ClientFlag
+from datetime import datetime, timedelta
+import threading
+import time
+from notification_templates import CATEGORY_NAMES, TEMPLATE_TEXT
+from sketches import QuantileSketch
+import storage
 
 app = Flask(__name__, static_folder='.', static_url_path='')
 CORS(app)  # Enable CORS for cross-origin requests
 
-# Database connection
-def create_connection():
+# Live delivery latency: one mergeable quantile sketch per minute (per process)
+LATENCY_WINDOW_MINUTES = 15
+MAX_LATENCY_MS = 24 * 60 * 60 * 1000  # Longer (or negative) latencies mean a bogus clock/payload
+latency_sketches = {}
+latency_lock = threading.Lock()
+
+# Deduplication is best-effort: only rows received in the last week are refreshed
+# (so the lookup prunes to recent partitions), and concurrent identical posts can
+# still both insert under READ COMMITTED. Deadlocks between them are retried.
+# Only the owning shard is checked, so after the shard list changes a recent
+# duplicate left on the previous shard is stored once more.
+DEDUPE_WINDOW_DAYS = 7
+DEADLOCK_RETRIES = 3
+
+# Database connection to the shard that owns a source (see storage.py)
+def create_connection(source, token=None):
+    return storage.connect_for(
+        source, token,
+        client_flags=[ClientFlag.FOUND_ROWS]  # UPDATE rowcount = matched rows
+    )
+
+def parse_int(value):
+    """Parse an optional integer (ID or epoch ms) from the request payload"""
     try:
-        connection = mysql.connector.connect(
-            host='localhost',  
-            user='root',       
-            password='varun5526',  
-            database='instagram'  
-        )
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
         return None
 
+def parse_template_ids(category_id, template_id):
+    """Return (category_id, template_id) with unknown IDs replaced by None
+
+    The columns are TINYINT/SMALLINT UNSIGNED, so an out-of-range value from a
+    client would make the INSERT fail and lose the notification.
+    """
+    if template_id not in TEMPLATE_TEXT:
+        template_id = None
+    if category_id not in CATEGORY_NAMES:
+        category_id = None
+    if template_id is not None:
+        category_id = template_id // 100  # A template always implies its category
+    return category_id, template_id
+
+def parse_delivery(sent_at_ms, delivered_at_ms):
+    """Return (sent_at, latency_ms), or (None, None) if the timestamps are not plausible"""
+    if sent_at_ms is None:
+        return None, None
+    latency_ms = delivered_at_ms - sent_at_ms
+    if not 0 <= latency_ms <= MAX_LATENCY_MS:
+        return None, None
+    try:
+        return datetime.fromtimestamp(sent_at_ms / 1000), latency_ms
+    except (ValueError, OverflowError, OSError):
+        return None, None
+
+def record_latency(latency_ms):
+    """Add a delivery latency to the current minute and drop expired minutes"""
+    minute = int(time.time() // 60)
+    with latency_lock:
+        latency_sketches.setdefault(minute, QuantileSketch()).add(latency_ms)
+        for expired in [m for m in latency_sketches if m <= minute - LATENCY_WINDOW_MINUTES]:
+            del latency_sketches[expired]
+
 # Serve Frontend
 @app.route('/')
 def home():
@@ -34,23 +87,54 @@ def store_notification():
     body = data.get('body')
     notification_type = data.get('type')  # Default to foreground
     source = data.get('source', 'Instagram')  # Default to Instagram
+    category_id = parse_int(data.get('category_id'))  # Set by send_notification.py templates
+    template_id = parse_int(data.get('template_id'))
+    sent_at_ms = parse_int(data.get('sent_at'))  # Epoch ms from the FCM data payload
+    delivered_at_ms = parse_int(data.get('delivered_at')) or int(time.time() * 1000)
+    token = data.get('token')  # Optional FCM token, used to spread a source across shards
 
     if not title or not body:
         return jsonify({"error": "Title and body are required"}), 400
 
-    connection = create_connection()
+    category_id, template_id = parse_template_ids(category_id, template_id)
+    sent_at, latency_ms = parse_delivery(sent_at_ms, delivered_at_ms)
+
+    connection = create_connection(source, token)
     if connection is None:
         return jsonify({"error": "Database connection failed"}), 500
 
+    # The partitioned table cannot carry the old unique key, so refresh a recent
+    # duplicate explicitly (moving it to the current partition) or insert
+    update_query = """
+    UPDATE notifications
+    SET received_at = CURRENT_TIMESTAMP, sent_at = %s, latency_ms = %s,
+        category_id = COALESCE(category_id, %s), template_id = COALESCE(template_id, %s)
+    WHERE title = %s AND body = %s AND type = %s AND source = %s AND received_at >= %s
+    """
+    insert_query = """
+    INSERT INTO notifications (title, body, type, source, category_id, template_id, sent_at, latency_ms)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """
+    # A literal cutoff (not NOW()) lets MySQL prune older partitions
+    cutoff = datetime.now() - timedelta(days=DEDUPE_WINDOW_DAYS)
+
     try:
         cursor = connection.cursor()
-        query = """
-        INSERT INTO notifications (title, body, type, source)
-        VALUES (%s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE received_at = CURRENT_TIMESTAMP
-        """
-        cursor.execute(query, (title, body, notification_type, source))
-        connection.commit()
+        for attempt in range(DEADLOCK_RETRIES):
+            try:
+                cursor.execute(update_query, (sent_at, latency_ms, category_id, template_id,
+                                              title, body, notification_type, source, cutoff))
+                if cursor.rowcount == 0:
+                    cursor.execute(insert_query, (title, body, notification_type, source, category_id, template_id,
+                                                  sent_at, latency_ms))
+                connection.commit()
+                break
+            except Error as e:
+                if e.errno != errorcode.ER_LOCK_DEADLOCK or attempt == DEADLOCK_RETRIES - 1:
+                    raise
+                connection.rollback()
+        if latency_ms is not None:
+            record_latency(latency_ms)
         return jsonify({"message": "Notification stored successfully"}), 200
     except Error as e:
         return jsonify({"error": str(e)}), 500
@@ -61,39 +145,32 @@ def store_notification():
 # Endpoint to get notification count
 @app.route('/notification-count', methods=['GET'])
 def get_notification_count():
-    connection = create_connection()
-    if connection is None:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor()
-        cursor.execute("SELECT COUNT(*) as total FROM notifications")
-        result = cursor.fetchone()
-        total = result[0] if result else 0
+        # Scatter-gather: sum the per-shard counts
+        results = storage.scatter("SELECT COUNT(*) as total FROM notifications")
+        total = sum(rows[0][0] for _, rows in results if rows)
         return jsonify({"total": total}), 200
     except Error as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        connection.close()
 
 # Endpoint to get recent notifications
 @app.route('/recent-notifications', methods=['GET'])
 def get_recent_notifications():
-    connection = create_connection()
-    if connection is None:
-        return jsonify({"error": "Database connection failed"}), 500
-
     try:
-        cursor = connection.cursor(dictionary=True)
-        # Get last 10 notifications ordered by most recent
-        cursor.execute("""
+        # Get last 10 notifications per shard, then keep the 10 most recent overall
+        results = storage.scatter("""
             SELECT id, title, body, type, source, received_at 
             FROM notifications 
             ORDER BY received_at DESC 
             LIMIT 10
-        """)
-        notifications = cursor.fetchall()
+        """, dictionary=True)
+        notifications = []
+        for shard, rows in results:
+            for notif in rows:
+                notif['shard'] = shard  # IDs are only unique within a shard
+                notifications.append(notif)
+        notifications.sort(key=lambda n: n['received_at'], reverse=True)
+        notifications = notifications[:10]
         
         # Convert datetime to string for JSON serialization
         for notif in notifications:
@@ -103,9 +180,32 @@ def get_recent_notifications():
         return jsonify({"notifications": notifications}), 200
     except Error as e:
         return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        connection.close()
+
+# Endpoint to get live delivery latency percentiles
+@app.route('/delivery-latency', methods=['GET'])
+def get_delivery_latency():
+    minutes = request.args.get('minutes', default=LATENCY_WINDOW_MINUTES, type=int)
+    minutes = max(1, min(minutes, LATENCY_WINDOW_MINUTES))
+    current = int(time.time() // 60)
+
+    merged = QuantileSketch()
+    with latency_lock:
+        for minute, sketch in latency_sketches.items():
+            if minute > current - minutes:
+                merged.merge(sketch)
+
+    def percentile(q):
+        value = merged.quantile(q)
+        return round(value, 1) if value is not None else None
+
+    return jsonify({
+        "window_minutes": minutes,
+        "count": merged.count,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+        "relative_error": merged.error_bound()
+    }), 200
 
 if __name__ == '__main__':
     app.run(debug=True, port=8000)
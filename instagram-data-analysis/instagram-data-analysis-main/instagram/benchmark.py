@@ -0,0 +1,264 @@
+"""
+Instagram Notification Pipeline Benchmark
+Times API endpoints under concurrent load and analytics functions at several table sizes
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from synthetic_data import DEFAULT_DATABASE, load_synthetic
+
+ENDPOINTS = [
+    ('GET', '/notification-count'),
+    ('GET', '/recent-notifications'),
+    ('GET', '/delivery-latency'),
+    ('POST', '/store-notification'),
+]
+
+# (function name, takes output_dir)
+ANALYTICS_FUNCTIONS = [
+    ('generate_summary_stats', False),
+    ('plot_notification_types', True),
+    ('plot_hourly_distribution', True),
+    ('plot_top_actions', True),
+    ('plot_notification_categories', True),
+    ('plot_daily_trend', True),
+    ('plot_day_of_week', True),
+    ('plot_time_period_heatmap', True),
+    ('plot_notification_timeline', True),
+    ('plot_delivery_latency', True),
+    ('generate_csv_reports', True),
+    ('generate_approx_report', True),
+]
+
+# Functions that return None when they fail instead of producing a result
+RESULT_FUNCTIONS = {'generate_summary_stats', 'generate_approx_report'}
+
+# Only lower-is-better metrics are compared against the baseline
+TRACKED_SUFFIXES = ('_ms', '/seconds')
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+def time_request(base_url, method, path, sequence):
+    """Send one request and return (elapsed_ms, ok)"""
+    data, headers = None, {}
+    if method == 'POST':
+        ms = int(time.time() * 1000)
+        data = json.dumps({
+            'title': 'Benchmark Notification',
+            'body': f"benchmark request {sequence} at {ms}",
+            'type': 'foreground',
+            'source': 'Benchmark',
+            'sent_at': ms,
+            'delivered_at': ms
+        }).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+    req = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    return (time.perf_counter() - start) * 1000, ok
+
+def bench_endpoint(base_url, method, path, requests=200, concurrency=16):
+    """Fire `requests` calls with `concurrency` workers and summarise latencies"""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: time_request(base_url, method, path, i), range(requests)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(ms for ms, _ in results)
+    return {
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'requests_per_s': requests / wall if wall > 0 else None,
+        'errors': sum(1 for _, ok in results if not ok)
+    }
+
+def time_analytics():
+    """Time every analytics function against storage's database; returns {name: seconds or None}"""
+    import analytics  # Imported lazily: pulls in pandas/matplotlib
+    analytics.STRICT = True  # Failed queries raise instead of returning early (and looking fast)
+
+    timings = {}
+    with tempfile.TemporaryDirectory() as output_dir:
+        for name, takes_output_dir in ANALYTICS_FUNCTIONS:
+            func = getattr(analytics, name)
+            output = io.StringIO()
+            start = time.perf_counter()
+            try:
+                with contextlib.redirect_stdout(output):
+                    result = func(output_dir) if takes_output_dir else func()
+                elapsed = time.perf_counter() - start
+                errors = [line for line in output.getvalue().splitlines() if line.lstrip().startswith('❌')]
+                if errors:
+                    raise RuntimeError(errors[0].strip())
+                if result is None and name in RESULT_FUNCTIONS:
+                    raise RuntimeError('returned no result')
+                timings[name] = elapsed
+            except Exception as e:
+                print(f"⚠️  {name} failed: {e}", file=sys.stderr)
+                timings[name] = None
+    return timings
+
+def bench_analytics(database):
+    """Time analytics in a child process whose storage points at `database` on every shard"""
+    # INSTAGRAM_DB is read by storage at import time, the same way app.py is pointed at it
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--analytics-worker'],
+                            env=dict(os.environ, INSTAGRAM_DB=database),
+                            stdout=subprocess.PIPE, text=True)
+    if result.returncode != 0 or not result.stdout.strip():
+        print(f"⚠️  Analytics worker failed (exit code {result.returncode})")
+        return {name: None for name, _ in ANALYTICS_FUNCTIONS}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def run_benchmark(args):
+    """Load each table size and collect endpoint and analytics metrics"""
+    metrics = {}
+    for size in args.sizes:
+        print(f"\n{'='*60}\n📦 Table size: {size:,} rows\n{'='*60}")
+        rate = load_synthetic(size, database=args.database, truncate=True, seed=args.seed,
+                              load_data=args.load_data)
+        if rate is None:
+            print("❌ Could not load synthetic data")
+            sys.exit(1)
+        metrics[f"{size}/load/rows_per_s"] = rate
+
+        if not args.skip_endpoints:
+            for method, path in ENDPOINTS:
+                result = bench_endpoint(args.base_url, method, path, args.requests, args.concurrency)
+                for key, value in result.items():
+                    metrics[f"{size}/endpoint/{method} {path}/{key}"] = value
+                print(f"🌐 {method:<4} {path:<22} p50={result['p50_ms']:.1f}ms "
+                      f"p95={result['p95_ms']:.1f}ms errors={result['errors']}")
+
+        if not args.skip_analytics:
+            for name, seconds in bench_analytics(args.database).items():
+                metrics[f"{size}/analytics/{name}/seconds"] = seconds
+                if seconds is not None:
+                    print(f"📊 {name:<30} {seconds:.3f}s")
+    return metrics
+
+def compare(metrics, baseline, threshold):
+    """Return [(name, baseline, current)] for tracked metrics that regressed past threshold"""
+    regressions = []
+    for name, current in metrics.items():
+        previous = baseline.get(name)
+        if not name.endswith(TRACKED_SUFFIXES) or current is None or not previous:
+            continue
+        if current > previous * (1 + threshold):
+            regressions.append((name, previous, current))
+    return regressions
+
+def health_failures(metrics, baseline=None):
+    """Return [(name, reason)] for failed requests and for timings that are missing or broke"""
+    failures = []
+    for name, current in metrics.items():
+        if name.endswith('/errors') and current:
+            failures.append((name, f"{current} failed request(s)"))
+        elif name.endswith(TRACKED_SUFFIXES) and current is None:
+            failures.append((name, 'no result'))
+    # A metric the baseline measured must still be measured
+    for name, previous in (baseline or {}).items():
+        if name.endswith(TRACKED_SUFFIXES) and previous is not None and name not in metrics:
+            failures.append((name, 'missing from this run'))
+    return failures
+
+def main():
+    """Main function with command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Benchmark the notification pipeline at several table sizes',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Start the API against the benchmark database first:
+  INSTAGRAM_DB=instagram_bench python app.py
+
+Examples:
+  python benchmark.py                                           # Default sizes, save results
+  python benchmark.py --sizes 1000000 --concurrency 32          # 1M rows, heavier load
+  python benchmark.py --baseline bench_results/bench_X.json     # Fail on >20% regressions
+        """
+    )
+    parser.add_argument('--sizes', type=lambda s: [int(x) for x in s.split(',')],
+                       default=[10000, 100000, 1000000], help='Comma-separated table sizes')
+    parser.add_argument('--database', type=str, default=DEFAULT_DATABASE,
+                       help='Benchmark database on every shard (it is truncated for every size)')
+    parser.add_argument('--base-url', type=str, default='http://localhost:8000',
+                       help='URL of the running app.py server')
+    parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients')
+    parser.add_argument('--load-data', action='store_true', help='Load rows with LOAD DATA LOCAL INFILE')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for repeatable data')
+    parser.add_argument('--skip-endpoints', action='store_true', help='Do not benchmark the API')
+    parser.add_argument('--skip-analytics', action='store_true', help='Do not benchmark analytics.py')
+    parser.add_argument('--output-dir', type=str, default='bench_results', help='Where to save JSON results')
+    parser.add_argument('--baseline', type=str, help='Previous results JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                       help='Allowed slowdown before a metric counts as a regression (0.2 = 20%%)')
+    parser.add_argument('--analytics-worker', action='store_true', help=argparse.SUPPRESS)
+
+    args = parser.parse_args()
+
+    if args.analytics_worker:
+        print(json.dumps(time_analytics()))
+        return
+
+    metrics = run_benchmark(args)
+
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+    filename = os.path.join(args.output_dir, f"bench_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(filename, 'w') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'config': {'sizes': args.sizes, 'requests': args.requests,
+                       'concurrency': args.concurrency, 'seed': args.seed},
+            'metrics': metrics
+        }, f, indent=2)
+    print(f"\n✅ Saved: {filename}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['metrics']
+
+    # Errors fail the run even without a baseline: a dead API or a broken
+    # analytics function would otherwise look fast
+    failures = health_failures(metrics, baseline)
+    if failures:
+        print(f"\n❌ {len(failures)} metric(s) failed:")
+        for name, reason in failures:
+            print(f"   {name}: {reason}")
+
+    regressions = compare(metrics, baseline, args.threshold) if baseline else []
+    if regressions:
+        print(f"\n❌ {len(regressions)} metric(s) regressed by more than {args.threshold:.0%}:")
+        for name, previous, current in regressions:
+            print(f"   {name}: {previous:.3f} → {current:.3f} ({current / previous - 1:+.0%})")
+
+    if failures or regressions:
+        sys.exit(1)
+    if baseline:
+        print(f"\n✅ No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
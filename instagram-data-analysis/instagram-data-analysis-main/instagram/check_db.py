@@ -1,28 +1,111 @@
-import mysql.connector
+import argparse
+import time
+from collections import deque
+import storage
+
+# The threaded API (with deadlock retries) can commit id N after id N+1 has
+# been polled, so follow mode re-checks this many ids below its position
+RESCAN_IDS = 200
+
+def print_header():
+    print(f"{'ID':<5} | {'Title':<25} | {'Body':<30} | {'Type':<12} | {'Time'}")
+    print("-" * 100)
+
+def print_row(row):
+    print(f"{row['id']:<5} | {row['title']:<25} | {row['body']:<30} | {row['type']:<12} | {row['received_at']}")
 
 def check_notifications():
     try:
-        connection = mysql.connector.connect(
-            host='localhost',
-            user='root',
-            password='varun5526',
-            database='instagram'
-        )
-        
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM notifications ORDER BY received_at DESC LIMIT 5")
-        rows = cursor.fetchall()
-        
-        print(f"{'ID':<5} | {'Title':<25} | {'Body':<30} | {'Type':<12} | {'Time'}")
-        print("-" * 100)
+        # Latest 5 per shard, then the latest 5 overall
+        results = storage.scatter("SELECT * FROM notifications ORDER BY received_at DESC LIMIT 5", dictionary=True)
+        rows = sorted((row for _, shard_rows in results for row in shard_rows),
+                      key=lambda row: row['received_at'], reverse=True)[:5]
+
+        print_header()
         for row in rows:
-            print(f"{row['id']:<5} | {row['title']:<25} | {row['body']:<30} | {row['type']:<12} | {row['received_at']}")
-            
-        cursor.close()
-        connection.close()
+            print_row(row)
+
+    except Exception as e:
+        print(f"Error: {e}")
+
+def follow_notifications(interval=1.0, notification_type=None, source=None, batch=500):
+    """Tail new rows over one connection per shard with an `id > last_seen - RESCAN_IDS` keyset query"""
+    connections = []
+    try:
+        # IDs are per shard, so each shard keeps its own connection and keyset position
+        cursors, last_seen, start_ids, seen = [], [], [], []
+        for shard in range(len(storage.SHARDS)):
+            connection = storage.connect(shard)
+            if connection is None:
+                return
+            connections.append(connection)
+            connection.autocommit = True  # Each poll sees rows committed since the last one
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute("SELECT COALESCE(MAX(id), 0) AS last_id FROM notifications")
+            last_seen.append(cursor.fetchone()['last_id'])
+            start_ids.append(last_seen[-1])  # Rows before startup are never printed
+            seen.append(set())  # Ids already scanned within the rescan window
+            cursors.append(cursor)
 
+        # Filters are applied in Python so the cursor advances past every scanned
+        # row, even when a rarely matching --type/--source returns nothing
+        query = """
+            SELECT id, title, body, type, source, received_at
+            FROM notifications
+            WHERE id > %s
+            ORDER BY id
+            LIMIT %s
+        """
+
+        print(f"Following notifications after ids {last_seen} (Ctrl+C to stop)")
+        print_header()
+        arrivals = deque()  # Arrival times of rows seen in the last minute
+        while True:
+            behind = False
+            now = time.time()
+            for shard, cursor in enumerate(cursors):
+                low = max(start_ids[shard], last_seen[shard] - RESCAN_IDS)
+                cursor.execute(query, (low, batch + RESCAN_IDS))
+                rows = cursor.fetchall()
+                for row in rows:
+                    if row['id'] in seen[shard]:
+                        continue
+                    seen[shard].add(row['id'])
+                    if notification_type and row['type'] != notification_type:
+                        continue
+                    if source and row['source'] != source:
+                        continue
+                    print_row(row)
+                    arrivals.append(now)
+                if rows:
+                    last_seen[shard] = max(last_seen[shard], rows[-1]['id'])
+                seen[shard] = {i for i in seen[shard] if i > last_seen[shard] - RESCAN_IDS}
+                # A full batch means we are behind; poll again immediately
+                behind = behind or len(rows) == batch + RESCAN_IDS
+            while arrivals and arrivals[0] < now - 60:
+                arrivals.popleft()
+            print(f"  {len(arrivals)} rows/min", end='\r', flush=True)
+            if not behind:
+                time.sleep(interval)
+
+    except KeyboardInterrupt:
+        print()
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        for connection in connections:
+            if connection.is_connected():
+                connection.close()
 
 if __name__ == "__main__":
-    check_notifications()
+    parser = argparse.ArgumentParser(description='Check stored notifications')
+    parser.add_argument('--follow', action='store_true', help='Keep printing new notifications as they arrive')
+    parser.add_argument('--interval', type=float, default=1.0, help='Seconds between polls in follow mode')
+    parser.add_argument('--type', choices=['foreground', 'background'], help='Only show this notification type')
+    parser.add_argument('--source', type=str, help='Only show this source')
+    args = parser.parse_args()
+
+    if args.follow:
+        follow_notifications(args.interval, args.type, args.source)
+    else:
+        check_notifications()
@@ -17,12 +17,21 @@ firebase.initializeApp(firebaseConfig);
 
 const messaging = firebase.messaging();
 
+// FCM token saved by index.html, sent with stored notifications for shard routing
+function getStoredToken() {
+    return caches.open('fcm')
+        .then((cache) => cache.match('/fcm-token'))
+        .then((response) => (response ? response.text() : null))
+        .catch(() => null);
+}
+
 // Handle background notifications
 messaging.onBackgroundMessage((payload) => {
     console.log('[firebase-messaging-sw.js] Received background message:', payload);
 
     const notificationTitle = payload.notification?.title || 'Background Notification';
     const notificationBody = payload.notification?.body || 'Background Body';
+    const data = payload.data || {};
 
     // Display the notification
     self.registration.showNotification(notificationTitle, {
@@ -31,18 +40,25 @@ messaging.onBackgroundMessage((payload) => {
     });
 
     // Send notification data to backend for MySQL storage
-    fetch('http://localhost:8000/store-notification', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({
-            title: notificationTitle,
-            body: notificationBody,
-            type: 'background', // Indicate background notification
-            source: 'Instagram', // Example source
-        }),
-    })
+    const deliveredAt = Date.now(); // Epoch ms when the browser received it
+    getStoredToken()
+        .then((token) => fetch('http://localhost:8000/store-notification', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({
+                title: notificationTitle,
+                body: notificationBody,
+                type: 'background', // Indicate background notification
+                source: 'Instagram', // Example source
+                token: token,
+                category_id: data.category_id, // Small-integer IDs for cheap grouping
+                template_id: data.template_id,
+                sent_at: data.sent_at, // Epoch ms set by the sender
+                delivered_at: deliveredAt,
+            }),
+        }))
         .then((response) => response.json())
         .then((data) => console.log('Notification stored in MySQL:', data))
         .catch((error) => console.error('Error storing notification in MySQL:', error));
@@ -1,17 +1,89 @@
 use instagram;
 
+-- Range-partitioned by month on received_at (maintain with maintenance.py).
+-- Every unique key must include the partitioning column, so duplicates are
+-- detected by store_notification via idx_notification instead of a unique key
+-- (best-effort, limited to the last 7 days).
 CREATE TABLE notifications (
-    id INT AUTO_INCREMENT PRIMARY KEY,
+    id INT AUTO_INCREMENT,
     title VARCHAR(255) NOT NULL,
     body TEXT NOT NULL,
     type ENUM('foreground', 'background') NOT NULL,
     source VARCHAR(50) DEFAULT 'Instagram',
-    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    UNIQUE KEY unique_notification (title, body(255), type, source)
+    category_id TINYINT UNSIGNED NULL,
+    template_id SMALLINT UNSIGNED NULL,
+    sent_at DATETIME(3) NULL,
+    latency_ms INT UNSIGNED NULL,
+    received_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, received_at),
+    KEY idx_notification (title, body(255), type, source),
+    KEY idx_category_id (category_id),
+    KEY idx_template_id (template_id),
+    KEY idx_received_at (received_at)
+)
+PARTITION BY RANGE (UNIX_TIMESTAMP(received_at)) (
+    PARTITION p_start VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+    PARTITION p202601 VALUES LESS THAN (UNIX_TIMESTAMP('2026-02-01 00:00:00')),
+    PARTITION p202602 VALUES LESS THAN (UNIX_TIMESTAMP('2026-03-01 00:00:00')),
+    PARTITION p202603 VALUES LESS THAN (UNIX_TIMESTAMP('2026-04-01 00:00:00')),
+    PARTITION p_future VALUES LESS THAN MAXVALUE
 );
+
+-- Then pre-create partitions up to a few months ahead:
+--   python instagram/maintenance.py precreate --months-ahead 3
+
+-- Migration for existing tables (IDs from notification_templates.py, delivery latency)
+-- ALTER TABLE notifications
+--     ADD COLUMN category_id TINYINT UNSIGNED NULL AFTER source,
+--     ADD COLUMN template_id SMALLINT UNSIGNED NULL AFTER category_id,
+--     ADD COLUMN sent_at DATETIME(3) NULL AFTER template_id,
+--     ADD COLUMN latency_ms INT UNSIGNED NULL AFTER sent_at,
+--     MODIFY received_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+--     DROP INDEX unique_notification,
+--     DROP PRIMARY KEY,
+--     ADD PRIMARY KEY (id, received_at),
+--     ADD KEY idx_notification (title, body(255), type, source),
+--     ADD KEY idx_category_id (category_id),
+--     ADD KEY idx_template_id (template_id),
+--     ADD KEY idx_received_at (received_at);
+-- ALTER TABLE notifications
+--     PARTITION BY RANGE (UNIX_TIMESTAMP(received_at)) (
+--         PARTITION p_start VALUES LESS THAN (UNIX_TIMESTAMP('2026-01-01 00:00:00')),
+--         PARTITION p_future VALUES LESS THAN MAXVALUE
+--     );
+-- Backfill template/category IDs for rows stored before the migration.
+-- Templates with two placeholders go first so a looser pattern cannot claim their rows;
+-- custom messages match no template and keep NULL IDs.
+-- UPDATE notifications SET category_id = 1, template_id = 103 WHERE template_id IS NULL AND body LIKE '% and % others liked your post 👍';
+-- UPDATE notifications SET category_id = 2, template_id = 203 WHERE template_id IS NULL AND body LIKE '% and % others commented on your post 🗨️';
+-- UPDATE notifications SET category_id = 1, template_id = 100 WHERE template_id IS NULL AND body LIKE '% liked your photo ❤️';
+-- UPDATE notifications SET category_id = 1, template_id = 101 WHERE template_id IS NULL AND body LIKE '% liked your video 💙';
+-- UPDATE notifications SET category_id = 1, template_id = 102 WHERE template_id IS NULL AND body LIKE '% liked your story ⭐';
+-- UPDATE notifications SET category_id = 2, template_id = 200 WHERE template_id IS NULL AND body LIKE '% commented on your post 💬';
+-- UPDATE notifications SET category_id = 2, template_id = 201 WHERE template_id IS NULL AND body LIKE '% mentioned you in a comment 📝';
+-- UPDATE notifications SET category_id = 2, template_id = 202 WHERE template_id IS NULL AND body LIKE '% replied to your comment 💭';
+-- UPDATE notifications SET category_id = 3, template_id = 300 WHERE template_id IS NULL AND body LIKE '% started following you 👤';
+-- UPDATE notifications SET category_id = 3, template_id = 301 WHERE template_id IS NULL AND body LIKE '% requested to follow you 🔔';
+-- UPDATE notifications SET category_id = 3, template_id = 302 WHERE template_id IS NULL AND body LIKE '% accepted your follow request ✅';
+-- UPDATE notifications SET category_id = 4, template_id = 400 WHERE template_id IS NULL AND body LIKE '% sent you a message 📨';
+-- UPDATE notifications SET category_id = 4, template_id = 401 WHERE template_id IS NULL AND body LIKE '% sent you a photo 📷';
+-- UPDATE notifications SET category_id = 4, template_id = 402 WHERE template_id IS NULL AND body LIKE '% sent you a video 🎥';
+-- UPDATE notifications SET category_id = 4, template_id = 403 WHERE template_id IS NULL AND body LIKE '% sent you a voice message 🎤';
+-- UPDATE notifications SET category_id = 4, template_id = 404 WHERE template_id IS NULL AND body LIKE 'You have % new messages 💌';
+-- UPDATE notifications SET category_id = 5, template_id = 500 WHERE template_id IS NULL AND body LIKE '% tagged you in a photo 🏷️';
+-- UPDATE notifications SET category_id = 5, template_id = 501 WHERE template_id IS NULL AND body LIKE '% tagged you in a story 📸';
+-- UPDATE notifications SET category_id = 5, template_id = 502 WHERE template_id IS NULL AND body LIKE '% mentioned you in their story 📱';
+-- UPDATE notifications SET category_id = 6, template_id = 600 WHERE template_id IS NULL AND body LIKE '% started a live video 🔴';
+-- UPDATE notifications SET category_id = 6, template_id = 601 WHERE template_id IS NULL AND body LIKE '% is live now! 📹';
+-- UPDATE notifications SET category_id = 7, template_id = 700 WHERE template_id IS NULL AND body LIKE '% shared your post 🔄';
+-- UPDATE notifications SET category_id = 7, template_id = 701 WHERE template_id IS NULL AND body LIKE '% added your post to their story 📲';
+-- UPDATE notifications SET category_id = 8, template_id = 801 WHERE template_id IS NULL AND body LIKE 'You have % new notifications 🔔';
+-- UPDATE notifications SET category_id = 8, template_id = 802 WHERE template_id IS NULL AND body LIKE 'Your story has % views 👀';
+-- UPDATE notifications SET category_id = 8, template_id = 800 WHERE template_id IS NULL AND body LIKE 'Your post is getting popular! 🔥';
    
 
 select * from notifications;
 
+-- Expired months are removed per partition instead of truncating the table:
+--   python instagram/maintenance.py retention --keep-months 6 --archive-dir archive
 truncate table notifications;
-
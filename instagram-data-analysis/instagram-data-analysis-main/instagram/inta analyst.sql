@@ -145,7 +145,7 @@ SELECT
     MIN(received_at) AS first_today,
     MAX(received_at) AS last_today
 FROM notifications
-WHERE DATE(received_at) = CURDATE()
+WHERE received_at >= CURDATE()
 GROUP BY type;
 
 -- ============================================
@@ -220,7 +220,7 @@ SELECT
     (SELECT COUNT(*) FROM notifications) AS total_notifications,
     (SELECT COUNT(*) FROM notifications WHERE type = 'foreground') AS foreground_count,
     (SELECT COUNT(*) FROM notifications WHERE type = 'background') AS background_count,
-    (SELECT COUNT(*) FROM notifications WHERE DATE(received_at) = CURDATE()) AS today_count,
+    (SELECT COUNT(*) FROM notifications WHERE received_at >= CURDATE()) AS today_count,
     (SELECT COUNT(*) FROM notifications WHERE received_at >= DATE_SUB(NOW(), INTERVAL 7 DAY)) AS last_7_days,
     (SELECT COUNT(DISTINCT DATE(received_at)) FROM notifications) AS active_days,
     (SELECT MAX(received_at) FROM notifications) AS last_notification,
@@ -246,11 +246,21 @@ SELECT
 FROM notifications
 GROUP BY type;
 
--- Data for bar chart (top notification actions)
+-- Data for bar chart (top notification actions, grouped by template ID)
 SELECT 
-    body AS action,
+    template_id,
     COUNT(*) AS count
 FROM notifications
-GROUP BY body
+WHERE template_id IS NOT NULL
+GROUP BY template_id
 ORDER BY count DESC
 LIMIT 10;
+
+-- Data for bar chart (notification categories)
+SELECT 
+    category_id,
+    COUNT(*) AS count
+FROM notifications
+WHERE category_id IS NOT NULL
+GROUP BY category_id
+ORDER BY count DESC;
@@ -0,0 +1,209 @@
+"""
+Instagram Notification Table Maintenance
+Pre-creates monthly partitions and applies the retention/archival policy
+"""
+
+import mysql.connector
+import argparse
+import csv
+import gzip
+import os
+import sys
+from datetime import date
+import storage
+
+TABLE = 'notifications'
+FUTURE_PARTITION = 'p_future'
+
+def create_connection(shard=0):
+    """Create MySQL database connection to one shard"""
+    connection = storage.connect(shard)
+    if connection is None:
+        print(f"❌ Error connecting to MySQL shard {shard}")
+    return connection
+
+def add_months(day, months):
+    """Return the first day of the month `months` after `day`"""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month_start):
+    """Monthly partitions are named pYYYYMM and hold rows before the next month"""
+    return f"p{month_start:%Y%m}"
+
+def list_partitions(cursor):
+    """Return [(name, upper_bound_epoch or None, approx_rows)] in partition order"""
+    cursor.execute("""
+        SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (TABLE,))
+    partitions = []
+    for name, description, rows in cursor.fetchall():
+        if name is None:
+            return []  # Table is not partitioned
+        bound = None if description == 'MAXVALUE' else int(description)
+        partitions.append((name, bound, rows))
+    return partitions
+
+def precreate_partitions(connection, months_ahead=3):
+    """Split p_future so that every month from the last bounded partition up to `months_ahead` has its own partition"""
+    cursor = connection.cursor()
+    partitions = list_partitions(cursor)
+    existing = {name for name, _, _ in partitions}
+    if FUTURE_PARTITION not in existing:
+        print(f"❌ Table '{TABLE}' is not partitioned (missing {FUTURE_PARTITION}); run instagram.sql first")
+        cursor.close()
+        return []
+
+    # Start right after the last bounded partition so no gap months end up
+    # merged into one partition (which would break retention and archive names)
+    this_month = date.today().replace(day=1)
+    last_bound = max((bound for _, bound, _ in partitions if bound is not None), default=None)
+    month = this_month
+    if last_bound is not None:
+        cursor.execute("SELECT DATE(FROM_UNIXTIME(%s))", (last_bound,))
+        month = min(cursor.fetchone()[0].replace(day=1), this_month)
+    last_month = add_months(this_month, months_ahead)
+
+    definitions, created = [], []
+    while month <= last_month:
+        name = partition_name(month)
+        month, start = add_months(month, 1), month
+        if name in existing:
+            continue
+        bound = add_months(start, 1)
+        definitions.append(f"PARTITION {name} VALUES LESS THAN (UNIX_TIMESTAMP('{bound:%Y-%m-%d} 00:00:00'))")
+        created.append(name)
+
+    if definitions:
+        definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+        cursor.execute(
+            f"ALTER TABLE {TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} INTO ({', '.join(definitions)})"
+        )
+        print(f"✅ Created partitions: {', '.join(created)}")
+    else:
+        print(f"✅ Partitions already exist for the next {months_ahead} month(s)")
+    cursor.close()
+    return created
+
+def archive_partition(connection, name, archive_dir, shard=0):
+    """Stream one partition to a gzip-compressed CSV and return the file path"""
+    if not os.path.exists(archive_dir):
+        os.makedirs(archive_dir)
+    filepath = os.path.join(archive_dir, f"{TABLE}_shard{shard}_{name}.csv.gz")
+
+    cursor = connection.cursor()  # Unbuffered: rows are written as they are fetched
+    cursor.execute(f"SELECT * FROM {TABLE} PARTITION ({name}) ORDER BY received_at")
+    count = 0
+    with gzip.open(filepath, 'wt', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(cursor.column_names)
+        for row in cursor:
+            writer.writerow(row)
+            count += 1
+    cursor.close()
+    print(f"📦 Archived {count} rows from {name} to: {filepath}")
+    return filepath
+
+def apply_retention(connection, keep_months=6, archive_dir=None, dry_run=False, shard=0):
+    """Drop (optionally archiving first) every partition that ends before the retention cutoff"""
+    cutoff = add_months(date.today().replace(day=1), -keep_months)
+    cursor = connection.cursor()
+    cursor.execute("SELECT UNIX_TIMESTAMP(%s)", (f"{cutoff:%Y-%m-%d} 00:00:00",))
+    cutoff_epoch = int(cursor.fetchone()[0])
+    expired = [(name, rows) for name, bound, rows in list_partitions(cursor)
+               if bound is not None and bound <= cutoff_epoch]
+    cursor.close()
+
+    if not expired:
+        print(f"✅ No partitions older than {cutoff:%Y-%m-%d}")
+        return []
+
+    for name, rows in expired:
+        if dry_run:
+            print(f"🔎 Would {'archive and ' if archive_dir else ''}drop {name} (~{rows} rows)")
+            continue
+        if archive_dir:
+            archive_partition(connection, name, archive_dir, shard)
+        cursor = connection.cursor()
+        cursor.execute(f"ALTER TABLE {TABLE} DROP PARTITION {name}")
+        cursor.close()
+        print(f"🗑️  Dropped partition: {name}")
+    return [name for name, _ in expired]
+
+def show_status(connection):
+    """Print the current partition layout"""
+    cursor = connection.cursor()
+    partitions = list_partitions(cursor)
+    cursor.close()
+
+    if not partitions:
+        print(f"⚠️  Table '{TABLE}' is not partitioned")
+        return
+    print(f"{'Partition':<12} | {'Rows (approx)':>13} | {'Upper Bound'}")
+    print("-" * 50)
+    for name, bound, rows in partitions:
+        upper = 'MAXVALUE' if bound is None else str(date.fromtimestamp(bound))
+        print(f"{name:<12} | {rows:>13} | {upper}")
+
+def main():
+    """Main function with command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Maintain the partitioned notifications table',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python maintenance.py status                                  # Show partitions
+  python maintenance.py precreate --months-ahead 3              # Pre-create future partitions
+  python maintenance.py retention --keep-months 6 --archive-dir archive   # Archive and drop old partitions
+        """
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('status', help='Show the partition layout')
+
+    precreate = subparsers.add_parser('precreate', help='Pre-create future monthly partitions')
+    precreate.add_argument('--months-ahead', type=int, default=3,
+                          help='Number of future months to create partitions for')
+
+    retention = subparsers.add_parser('retention', help='Drop or archive expired partitions')
+    retention.add_argument('--keep-months', type=int, default=6,
+                          help='Number of full months to keep besides the current one')
+    retention.add_argument('--archive-dir', type=str,
+                          help='Export expired partitions to gzip CSV files here before dropping')
+    retention.add_argument('--dry-run', action='store_true',
+                          help='Only show which partitions would be removed')
+    parser.add_argument('--shard', type=int,
+                       help='Only maintain this shard (default: every shard in storage.SHARDS)')
+
+    args = parser.parse_args()
+
+    shards = [args.shard] if args.shard is not None else range(len(storage.SHARDS))
+    failed = False
+    for shard in shards:
+        print(f"\n🗄️  Shard {shard} ({storage.SHARDS[shard]['host']}:{storage.SHARDS[shard]['port']})")
+        connection = create_connection(shard)
+        if connection is None:
+            failed = True
+            continue
+
+        try:
+            if args.command == 'status':
+                show_status(connection)
+            elif args.command == 'precreate':
+                precreate_partitions(connection, args.months_ahead)
+            elif args.command == 'retention':
+                apply_retention(connection, args.keep_months, args.archive_dir, args.dry_run, shard)
+        except mysql.connector.Error as e:
+            print(f"❌ Maintenance failed: {e}")
+            failed = True
+        finally:
+            connection.close()
+
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Instagram Notification Templates
+Shared template catalogue with stable small-integer IDs for storage and grouping
+"""
+
+# Expanded notification templates with emojis
+# IDs are derived from position, so only ever APPEND categories and templates
+NOTIFICATION_TEMPLATES = {
+    'likes': [
+        "{user} liked your photo ❤️",
+        "{user} liked your video 💙",
+        "{user} liked your story ⭐",
+        "{user} and {count} others liked your post 👍",
+    ],
+    'comments': [
+        "{user} commented on your post 💬",
+        "{user} mentioned you in a comment 📝",
+        "{user} replied to your comment 💭",
+        "{user} and {count} others commented on your post 🗨️",
+    ],
+    'follows': [
+        "{user} started following you 👤",
+        "{user} requested to follow you 🔔",
+        "{user} accepted your follow request ✅",
+    ],
+    'messages': [
+        "{user} sent you a message 📨",
+        "{user} sent you a photo 📷",
+        "{user} sent you a video 🎥",
+        "{user} sent you a voice message 🎤",
+        "You have {count} new messages 💌",
+    ],
+    'tags': [
+        "{user} tagged you in a photo 🏷️",
+        "{user} tagged you in a story 📸",
+        "{user} mentioned you in their story 📱",
+    ],
+    'live': [
+        "{user} started a live video 🔴",
+        "{user} is live now! 📹",
+    ],
+    'posts': [
+        "{user} shared your post 🔄",
+        "{user} added your post to their story 📲",
+    ],
+    'activity': [
+        "Your post is getting popular! 🔥",
+        "You have {count} new notifications 🔔",
+        "Your story has {count} views 👀",
+    ]
+}
+
+# Instagram-style usernames
+USERNAMES = [
+    "alex_photography", "sarah_travels", "mike_fitness", "emma_foodie",
+    "john_tech", "lisa_art", "david_music", "anna_fashion",
+    "chris_sports", "maria_beauty", "james_gaming", "sophie_books",
+    "ryan_cooking", "olivia_yoga", "daniel_cars", "emily_pets"
+]
+
+# Category IDs start at 1 (TINYINT); template IDs are category_id * 100 + position (SMALLINT)
+CATEGORY_IDS = {category: i + 1 for i, category in enumerate(NOTIFICATION_TEMPLATES)}
+CATEGORY_NAMES = {category_id: category for category, category_id in CATEGORY_IDS.items()}
+
+TEMPLATE_TEXT = {
+    CATEGORY_IDS[category] * 100 + position: template
+    for category, templates in NOTIFICATION_TEMPLATES.items()
+    for position, template in enumerate(templates)
+}
+
+def get_template_id(category, position):
+    """Return the stable template ID for a category and template position"""
+    return CATEGORY_IDS[category] * 100 + position
+
+def get_template_label(template_id):
+    """Return a human-readable label for a template ID"""
+    template = TEMPLATE_TEXT.get(template_id)
+    if template is None:
+        return f"Template {template_id}"
+    return template.format(user='{user}', count='N')
@@ -10,6 +10,7 @@ import argparse
 import time
 from datetime import datetime
 import sys
+from notification_templates import NOTIFICATION_TEMPLATES, USERNAMES, CATEGORY_IDS, get_template_id
 
 # Initialize Firebase Admin
 try:
@@ -21,71 +22,18 @@ except Exception as e:
     print("Please make sure 'firebase_service.json' exists and the path is correct.")
     sys.exit(1)
 
-# Expanded notification templates with emojis
-NOTIFICATION_TEMPLATES = {
-    'likes': [
-        "{user} liked your photo ❤️",
-        "{user} liked your video 💙",
-        "{user} liked your story ⭐",
-        "{user} and {count} others liked your post 👍",
-    ],
-    'comments': [
-        "{user} commented on your post 💬",
-        "{user} mentioned you in a comment 📝",
-        "{user} replied to your comment 💭",
-        "{user} and {count} others commented on your post 🗨️",
-    ],
-    'follows': [
-        "{user} started following you 👤",
-        "{user} requested to follow you 🔔",
-        "{user} accepted your follow request ✅",
-    ],
-    'messages': [
-        "{user} sent you a message 📨",
-        "{user} sent you a photo 📷",
-        "{user} sent you a video 🎥",
-        "{user} sent you a voice message 🎤",
-        "You have {count} new messages 💌",
-    ],
-    'tags': [
-        "{user} tagged you in a photo 🏷️",
-        "{user} tagged you in a story 📸",
-        "{user} mentioned you in their story 📱",
-    ],
-    'live': [
-        "{user} started a live video 🔴",
-        "{user} is live now! 📹",
-    ],
-    'posts': [
-        "{user} shared your post 🔄",
-        "{user} added your post to their story 📲",
-    ],
-    'activity': [
-        "Your post is getting popular! 🔥",
-        "You have {count} new notifications 🔔",
-        "Your story has {count} views 👀",
-    ]
-}
-
-# Instagram-style usernames
-USERNAMES = [
-    "alex_photography", "sarah_travels", "mike_fitness", "emma_foodie",
-    "john_tech", "lisa_art", "david_music", "anna_fashion",
-    "chris_sports", "maria_beauty", "james_gaming", "sophie_books",
-    "ryan_cooking", "olivia_yoga", "daniel_cars", "emily_pets"
-]
-
 def get_random_notification():
     """Generate a random Instagram-like notification with realistic content"""
     category = random.choice(list(NOTIFICATION_TEMPLATES.keys()))
-    template = random.choice(NOTIFICATION_TEMPLATES[category])
+    position = random.randrange(len(NOTIFICATION_TEMPLATES[category]))
+    template = NOTIFICATION_TEMPLATES[category][position]
     user = random.choice(USERNAMES)
     count = random.randint(2, 50)
     
     body = template.format(user=user, count=count)
-    return body, category
+    return body, category, get_template_id(category, position)
 
-def send_notification(token, title, body, category=None):
+def send_notification(token, title, body, category=None, template_id=None):
     """
     Sends a push notification to a device using FCM
     
@@ -94,19 +42,28 @@ def send_notification(token, title, body, category=None):
         title: Notification title
         body: Notification body
         category: Notification category (optional)
+        template_id: Template ID from notification_templates (optional)
     """
     try:
         # Create the notification payload with additional data
+        data = {
+            'category': category or 'general',
+            'timestamp': str(int(time.time())),
+            'sent_at': str(int(time.time() * 1000)),  # Epoch ms, used for delivery latency
+            'click_action': 'FLUTTER_NOTIFICATION_CLICK'
+        }
+        # FCM data values must be strings; IDs are omitted for custom messages
+        if category in CATEGORY_IDS:
+            data['category_id'] = str(CATEGORY_IDS[category])
+        if template_id is not None:
+            data['template_id'] = str(template_id)
+
         message = messaging.Message(
             notification=messaging.Notification(
                 title=title,
                 body=body,
             ),
-            data={
-                'category': category or 'general',
-                'timestamp': str(int(time.time())),
-                'click_action': 'FLUTTER_NOTIFICATION_CLICK'
-            },
+            data=data,
             token=token,
         )
 
@@ -136,10 +93,10 @@ def send_bulk_notifications(token, count=5, delay=2):
     
     success_count = 0
     for i in range(count):
-        body, category = get_random_notification()
+        body, category, template_id = get_random_notification()
         title = "Instagram Notification"
         
-        result = send_notification(token, title, body, category)
+        result = send_notification(token, title, body, category, template_id)
         if result:
             success_count += 1
         
@@ -165,8 +122,8 @@ def interactive_mode(token):
         choice = input("\nEnter your choice (1-4): ").strip()
         
         if choice == '1':
-            body, category = get_random_notification()
-            send_notification(token, "Instagram Notification", body, category)
+            body, category, template_id = get_random_notification()
+            send_notification(token, "Instagram Notification", body, category, template_id)
         
         elif choice == '2':
             title = input("Enter title: ").strip() or "Instagram Notification"
@@ -241,8 +198,8 @@ Examples:
     
     # Default: send one random notification
     else:
-        body, category = get_random_notification()
-        send_notification(args.token, args.title, body, category)
+        body, category, template_id = get_random_notification()
+        send_notification(args.token, args.title, body, category, template_id)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,246 @@
+"""
+Instagram Notification Sketches
+Mergeable, serializable probabilistic summaries for approximate analytics
+"""
+
+import base64
+import hashlib
+import math
+
+def _hash64(value):
+    """Return a stable 64-bit hash for any value"""
+    digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+class HyperLogLog:
+    """HyperLogLog distinct counter (relative standard error 1.04 / sqrt(2^p))"""
+
+    def __init__(self, p=12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, value):
+        x = _hash64(value)
+        index = x >> (64 - self.p)
+        rest = x & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self):
+        alpha = 0.7213 / (1 + 1.079 / self.m)
+        estimate = alpha * self.m * self.m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        # Linear counting is more accurate for small cardinalities
+        if estimate <= 2.5 * self.m and zeros:
+            estimate = self.m * math.log(self.m / zeros)
+        return int(round(estimate))
+
+    def error_bound(self):
+        """Relative standard error of count()"""
+        return 1.04 / math.sqrt(self.m)
+
+    def merge(self, other):
+        if other.p != self.p:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+        return self
+
+    def to_dict(self):
+        return {'p': self.p, 'registers': base64.b64encode(bytes(self.registers)).decode('ascii')}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['p'])
+        sketch.registers = bytearray(base64.b64decode(data['registers']))
+        return sketch
+
+class SpaceSaving:
+    """Space-Saving top-K counter; each count overestimates by at most total / capacity"""
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.total = 0
+        self.counters = {}  # item -> [count, overestimate]
+
+    def add(self, item, n=1):
+        self.total += n
+        if item in self.counters:
+            self.counters[item][0] += n
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [n, 0]
+        else:
+            # Evict the smallest counter and inherit its count as error
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + n, floor]
+
+    def top(self, k=10):
+        """Return [(item, estimated_count, max_overestimate)] sorted by count"""
+        ranked = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)
+        return [(item, count, error) for item, (count, error) in ranked[:k]]
+
+    def error_bound(self):
+        """Maximum absolute overestimate of any reported count"""
+        return self.total / self.capacity
+
+    def merge(self, other):
+        # Items missing from a full summary may have occurred up to its minimum count
+        self_floor = min((c[0] for c in self.counters.values()), default=0) if len(self.counters) >= self.capacity else 0
+        other_floor = min((c[0] for c in other.counters.values()), default=0) if len(other.counters) >= other.capacity else 0
+        merged = {}
+        for item in set(self.counters) | set(other.counters):
+            a = self.counters.get(item, [self_floor, self_floor])
+            b = other.counters.get(item, [other_floor, other_floor])
+            merged[item] = [a[0] + b[0], a[1] + b[1]]
+        ranked = sorted(merged.items(), key=lambda kv: kv[1][0], reverse=True)
+        self.counters = dict(ranked[:self.capacity])
+        self.total += other.total
+        return self
+
+    def to_dict(self):
+        return {
+            'capacity': self.capacity,
+            'total': self.total,
+            'counters': [[item, count, error] for item, (count, error) in self.counters.items()]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['capacity'])
+        sketch.total = data['total']
+        sketch.counters = {item: [count, error] for item, count, error in data['counters']}
+        return sketch
+
+class QuantileSketch:
+    """DDSketch-style quantile sketch with bounded relative error on non-negative values"""
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = {}  # bucket index -> count
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value):
+        self.add_bucket(math.ceil(math.log(value) / self.log_gamma) if value > 0 else None)
+
+    def add_bucket(self, index, n=1):
+        """Add n values by bucket index, e.g. pre-computed in SQL as CEIL(LN(v) / LN(gamma)); None = zero"""
+        self.count += n
+        if index is None:
+            self.zero_count += n
+        else:
+            self.buckets[index] = self.buckets.get(index, 0) + n
+
+    def quantile(self, q):
+        """Estimate the q-th quantile (0 <= q <= 1), or None if empty"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def error_bound(self):
+        """Relative error of any quantile()"""
+        return self.relative_accuracy
+
+    def merge(self, other):
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge quantile sketches with different accuracy")
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'buckets': {str(index): n for index, n in self.buckets.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        sketch.buckets = {int(index): n for index, n in data['buckets'].items()}
+        return sketch
+
+class NotificationSketch:
+    """Streaming summary of a run of notifications, mergeable across days"""
+
+    def __init__(self):
+        self.total = 0
+        self.type_counts = {}
+        self.distinct_bodies = HyperLogLog()
+        self.top_actions = SpaceSaving()
+        self.inter_arrival = QuantileSketch()
+        self.first_at = None  # epoch seconds
+        self.last_at = None
+
+    def add(self, received_at, notification_type, body, action):
+        """Add one notification; rows must arrive in received_at order (action None = not a template)"""
+        ts = received_at.timestamp()
+        self.total += 1
+        self.type_counts[notification_type] = self.type_counts.get(notification_type, 0) + 1
+        self.distinct_bodies.add(body)
+        if action is not None:
+            self.top_actions.add(action)
+        if self.last_at is not None:
+            self.inter_arrival.add(ts - self.last_at)
+        if self.first_at is None:
+            self.first_at = ts
+        self.last_at = ts
+
+    def merge(self, other):
+        """Merge a later sketch into this one"""
+        if other.total == 0:
+            return self
+        # Account for the single gap between the two runs
+        if self.last_at is not None and other.first_at is not None:
+            self.inter_arrival.add(max(0.0, other.first_at - self.last_at))
+        self.total += other.total
+        for ntype, n in other.type_counts.items():
+            self.type_counts[ntype] = self.type_counts.get(ntype, 0) + n
+        self.distinct_bodies.merge(other.distinct_bodies)
+        self.top_actions.merge(other.top_actions)
+        self.inter_arrival.merge(other.inter_arrival)
+        if self.first_at is None:
+            self.first_at = other.first_at
+        self.last_at = other.last_at
+        return self
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'type_counts': self.type_counts,
+            'distinct_bodies': self.distinct_bodies.to_dict(),
+            'top_actions': self.top_actions.to_dict(),
+            'inter_arrival': self.inter_arrival.to_dict(),
+            'first_at': self.first_at,
+            'last_at': self.last_at
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.total = data['total']
+        sketch.type_counts = data['type_counts']
+        sketch.distinct_bodies = HyperLogLog.from_dict(data['distinct_bodies'])
+        sketch.top_actions = SpaceSaving.from_dict(data['top_actions'])
+        sketch.inter_arrival = QuantileSketch.from_dict(data['inter_arrival'])
+        sketch.first_at = data['first_at']
+        sketch.last_at = data['last_at']
+        return sketch
@@ -0,0 +1,108 @@
+"""
+Instagram Notification Storage Routing
+Maps each notification source (optionally plus device token) to one of N MySQL shards
+"""
+
+import mysql.connector
+from mysql.connector import Error
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared credentials; every shard holds the same schema (run instagram.sql on each)
+DB_USER = 'root'
+DB_PASSWORD = 'varun5526'
+DB_NAME = os.environ.get('INSTAGRAM_DB', 'instagram')
+
+def parse_shards(spec):
+    """Parse 'host:port,host:port' into shard configs"""
+    shards = []
+    for entry in spec.split(','):
+        host, _, port = entry.strip().partition(':')
+        shards.append({
+            'host': host,
+            'port': int(port or 3306),
+            'user': DB_USER,
+            'password': DB_PASSWORD,
+            'database': DB_NAME
+        })
+    return shards
+
+# Add local MySQL instances to scale writes, e.g. INSTAGRAM_SHARDS=localhost:3306,localhost:3307
+SHARDS = parse_shards(os.environ.get('INSTAGRAM_SHARDS', 'localhost:3306'))
+
+def parse_source_shards(spec):
+    """Parse 'Source:shard,Source:shard' into {source: shard index}"""
+    pins = {}
+    for entry in spec.split(','):
+        source, _, shard = entry.strip().rpartition(':')
+        if source:
+            pins[source] = int(shard)
+    return pins
+
+# Pin noisy sources to a dedicated shard, e.g. INSTAGRAM_SOURCE_SHARDS=Benchmark:1,NoisySource:2
+SOURCE_SHARDS = parse_source_shards(os.environ.get('INSTAGRAM_SOURCE_SHARDS', ''))
+
+# Sources whose rows are spread across all shards by device token instead of living on one,
+# e.g. INSTAGRAM_TOKEN_SPREAD_SOURCES=Instagram,OtherApp (empty to route every source whole)
+TOKEN_SPREAD_SOURCES = {source.strip() for source in
+                        os.environ.get('INSTAGRAM_TOKEN_SPREAD_SOURCES', 'Instagram').split(',')
+                        if source.strip()}
+
+def shard_for(source, token=None):
+    """Return the shard index for a source (and token, for spread sources)"""
+    if source in SOURCE_SHARDS:
+        return SOURCE_SHARDS[source] % len(SHARDS)
+    key = source or ''
+    if token and source in TOKEN_SPREAD_SOURCES:
+        key = f"{key}:{token}"
+    # crc32 is stable across processes, unlike hash(). Changing the shard count re-routes
+    # most keys, and deduplication in app.py only sees the new owner (see README)
+    return zlib.crc32(key.encode('utf-8')) % len(SHARDS)
+
+def connect(shard, **kwargs):
+    """Create a connection to one shard, or None on failure
+
+    Keyword arguments override the shard config, e.g. database='instagram_bench'
+    (an empty database gives a server-level connection).
+    """
+    config = dict(SHARDS[shard], **kwargs)
+    if not config.get('database'):
+        config.pop('database', None)
+    try:
+        return mysql.connector.connect(**config)
+    except Error as e:
+        print(f"Error connecting to MySQL shard {shard}: {e}")
+        return None
+
+def connect_for(source, token=None, **kwargs):
+    """Create a connection to the shard that owns a source/token"""
+    return connect(shard_for(source, token), **kwargs)
+
+def scatter(query, params=None, dictionary=False):
+    """Run a read query on every shard in parallel and return [(shard, rows)]
+
+    Raises mysql.connector.Error if any shard fails, since partial
+    aggregates would be silently wrong.
+    """
+    def run(shard):
+        connection = connect(shard)
+        if connection is None:
+            raise Error(f"Database connection failed for shard {shard}")
+        try:
+            cursor = connection.cursor(dictionary=dictionary)
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            cursor.close()
+            return shard, rows
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=len(SHARDS)) as pool:
+        return list(pool.map(run, range(len(SHARDS))))
+
+def sqlalchemy_url(shard):
+    """SQLAlchemy connection string for one shard"""
+    config = SHARDS[shard]
+    return (f"mysql+mysqlconnector://{config['user']}:{config['password']}"
+            f"@{config['host']}:{config['port']}/{config['database']}")
@@ -0,0 +1,216 @@
+"""
+Instagram Notification Synthetic Data Generator
+Bulk-loads realistic notifications into every MySQL shard for benchmarking
+"""
+
+import argparse
+import csv
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from notification_templates import TEMPLATE_TEXT, USERNAMES
+import storage
+
+# Separate benchmark database, created on every shard in storage.SHARDS
+DEFAULT_DATABASE = 'instagram_bench'
+
+# Schema is copied (including partitions) from the main database (INSTAGRAM_DB)
+SOURCE_DATABASE = storage.DB_NAME
+
+COLUMNS = ('title', 'body', 'type', 'source', 'category_id', 'template_id',
+           'sent_at', 'latency_ms', 'received_at')
+
+def create_connection(shard, database, allow_local_infile=False):
+    """Create MySQL database connection to one shard ('' = server level)"""
+    connection = storage.connect(shard, database=database, allow_local_infile=allow_local_infile)
+    if connection is None:
+        print(f"❌ Error connecting to MySQL shard {shard}")
+    return connection
+
+def ensure_schema(database):
+    """Create the benchmark database and a notifications table LIKE the main one on every shard"""
+    for shard in range(len(storage.SHARDS)):
+        connection = create_connection(shard, database='')
+        if connection is None:
+            return False
+        try:
+            cursor = connection.cursor()
+            cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}`")
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS `{database}`.notifications "
+                           f"LIKE `{SOURCE_DATABASE}`.notifications")
+            cursor.close()
+        finally:
+            connection.close()
+    return True
+
+class NotificationGenerator:
+    """Draws notifications from the template/username catalogue with configurable skew"""
+
+    def __init__(self, days=30, template_skew=1.1, peak_hour=20, diurnal=0.6,
+                 recency=0.0, background_ratio=0.3, sources=('Instagram',), devices=1000, seed=None):
+        self.random = random.Random(seed)
+        self.sources = list(sources)
+        self.devices = devices
+        self.end = datetime.now().replace(minute=0, second=0, microsecond=0)
+        self.days = days
+
+        # Zipf-like popularity over templates (rank 1 = most popular)
+        self.template_ids = sorted(TEMPLATE_TEXT)
+        self.random.shuffle(self.template_ids)
+        self.template_weights = self._cumulative(
+            [1.0 / (rank + 1) ** template_skew for rank in range(len(self.template_ids))])
+
+        # Diurnal cycle peaking at peak_hour, optionally weighted towards recent days
+        self.hour_weights = self._cumulative(
+            [1 + diurnal * math.cos(2 * math.pi * (h - peak_hour) / 24) for h in range(24)])
+        self.day_weights = self._cumulative([(d + 1) ** recency for d in range(days)])
+        self.background_ratio = background_ratio
+
+    @staticmethod
+    def _cumulative(weights):
+        total, cumulative = 0.0, []
+        for w in weights:
+            total += w
+            cumulative.append(total)
+        return cumulative
+
+    def row(self):
+        """Return (row in COLUMNS order, device token) for one notification"""
+        rnd = self.random
+        template_id = rnd.choices(self.template_ids, cum_weights=self.template_weights)[0]
+        body = TEMPLATE_TEXT[template_id].format(user=rnd.choice(USERNAMES), count=rnd.randint(2, 50))
+
+        day = rnd.choices(range(self.days), cum_weights=self.day_weights)[0]  # 0 = oldest
+        hour = rnd.choices(range(24), cum_weights=self.hour_weights)[0]
+        received_at = (self.end - timedelta(days=self.days - 1 - day)).replace(hour=hour) \
+            + timedelta(seconds=rnd.randrange(3600))
+        if received_at > datetime.now():
+            received_at -= timedelta(days=1)  # Today's later hours have not happened yet
+        latency_ms = int(rnd.lognormvariate(5.5, 0.8))  # median ~250 ms with a long tail
+        sent_at = received_at - timedelta(milliseconds=latency_ms)
+        ntype = 'background' if rnd.random() < self.background_ratio else 'foreground'
+        source = rnd.choice(self.sources)
+        token = f"synthetic-device-{rnd.randrange(self.devices)}"  # Only used for shard routing
+
+        return (("Instagram Notification", body, ntype, source, template_id // 100, template_id,
+                 sent_at.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3], latency_ms,
+                 received_at.strftime('%Y-%m-%d %H:%M:%S')), token)
+
+def insert_batch(cursor, batch, load_data=False):
+    """Write one batch of rows through an open cursor"""
+    if load_data:
+        # LOAD DATA is the fastest path but needs local_infile enabled on the server
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='',
+                                         encoding='utf-8', delete=False) as f:
+            csv.writer(f).writerows(batch)
+        try:
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE %s INTO TABLE notifications CHARACTER SET utf8mb4 "
+                f"FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                f"LINES TERMINATED BY '\\r\\n' ({', '.join(COLUMNS)})", (f.name,))
+        finally:
+            os.remove(f.name)
+    else:
+        # executemany rewrites this into one multi-row INSERT per batch
+        insert_query = (f"INSERT INTO notifications ({', '.join(COLUMNS)}) "
+                        f"VALUES ({', '.join(['%s'] * len(COLUMNS))})")
+        cursor.executemany(insert_query, batch)
+
+def load_synthetic(rows, database=DEFAULT_DATABASE, batch_size=10000, truncate=False, load_data=False, **options):
+    """Bulk-load `rows` synthetic notifications, routed like the API writes them, and return rows per second"""
+    if not ensure_schema(database):
+        return None
+    connections = []
+    try:
+        for shard in range(len(storage.SHARDS)):
+            connection = create_connection(shard, database, allow_local_infile=load_data)
+            if connection is None:
+                return None
+            connections.append(connection)
+        cursors = [connection.cursor() for connection in connections]
+        if truncate:
+            for cursor in cursors:
+                cursor.execute("TRUNCATE TABLE notifications")
+
+        generator = NotificationGenerator(**options)
+        source_index = COLUMNS.index('source')
+        start = time.perf_counter()
+        loaded, per_shard = 0, [0] * len(connections)
+        while loaded < rows:
+            # Each shard gets the rows storage.shard_for would route to it
+            batches = [[] for _ in connections]
+            for _ in range(min(batch_size, rows - loaded)):
+                row, token = generator.row()
+                batches[storage.shard_for(row[source_index], token)].append(row)
+            for shard, batch in enumerate(batches):
+                if batch:
+                    insert_batch(cursors[shard], batch, load_data)
+                    connections[shard].commit()
+                    per_shard[shard] += len(batch)
+            loaded = sum(per_shard)
+            print(f"⏳ Loaded {loaded}/{rows} rows", end='\r')
+        for cursor in cursors:
+            cursor.close()
+    finally:
+        for connection in connections:
+            connection.close()
+
+    elapsed = time.perf_counter() - start
+    rate = loaded / elapsed if elapsed > 0 else float(loaded)
+    print(f"\n✅ Loaded {loaded} rows into {database}.notifications in {elapsed:.1f}s ({rate:,.0f} rows/s)")
+    if len(per_shard) > 1:
+        print(f"   Rows per shard: {per_shard}")
+    return rate
+
+def main():
+    """Main function with command-line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Bulk-load synthetic Instagram notifications into MySQL',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python synthetic_data.py --rows 1000000 --truncate            # 1M rows over the last 30 days
+  python synthetic_data.py --rows 100000000 --load-data         # 100M rows via LOAD DATA LOCAL INFILE
+  python synthetic_data.py --rows 100000 --skew 2 --recency 3   # Few hot templates, mostly recent days
+        """
+    )
+    parser.add_argument('--rows', type=int, default=100000, help='Number of rows to generate')
+    parser.add_argument('--database', type=str, default=DEFAULT_DATABASE,
+                       help='Target database on every shard (created LIKE the main schema if missing)')
+    parser.add_argument('--batch', type=int, default=10000, help='Rows per INSERT/LOAD batch')
+    parser.add_argument('--truncate', action='store_true', help='Empty the table before loading')
+    parser.add_argument('--load-data', action='store_true',
+                       help='Use LOAD DATA LOCAL INFILE (requires local_infile=ON)')
+    parser.add_argument('--days', type=int, default=30, help='Spread rows over the last N days')
+    parser.add_argument('--skew', type=float, default=1.1,
+                       help='Zipf exponent for template popularity (0 = uniform)')
+    parser.add_argument('--peak-hour', type=int, default=20, help='Hour of day with the most traffic')
+    parser.add_argument('--diurnal', type=float, default=0.6,
+                       help='Strength of the daily cycle (0 = flat, 1 = strong)')
+    parser.add_argument('--recency', type=float, default=0.0,
+                       help='Weight recent days more heavily (0 = uniform across days)')
+    parser.add_argument('--background-ratio', type=float, default=0.3,
+                       help='Fraction of background notifications')
+    parser.add_argument('--sources', type=lambda s: s.split(','), default=['Instagram'],
+                       help='Comma-separated sources to draw from (each is routed like the API does)')
+    parser.add_argument('--devices', type=int, default=1000,
+                       help='Number of distinct device tokens (spreads TOKEN_SPREAD_SOURCES rows)')
+    parser.add_argument('--seed', type=int, help='Random seed for repeatable data')
+
+    args = parser.parse_args()
+
+    rate = load_synthetic(args.rows, database=args.database, batch_size=args.batch,
+                          truncate=args.truncate, load_data=args.load_data,
+                          days=args.days, template_skew=args.skew, peak_hour=args.peak_hour,
+                          diurnal=args.diurnal, recency=args.recency,
+                          background_ratio=args.background_ratio, sources=args.sources,
+                          devices=args.devices, seed=args.seed)
+    if rate is None:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()